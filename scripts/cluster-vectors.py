@@ -8,7 +8,14 @@ from sklearn.preprocessing import StandardScaler
 from sklearn.decomposition import PCA
 
 import hdbscan
-from sklearn.manifold import TSNE
+
+# prefer FFT-accelerated tSNE (FIt-SNE) from openTSNE if it's installed;
+# fall back to sklearn's Barnes-Hut implementation otherwise.
+try:
+    from openTSNE import TSNE as FITSNE
+except ImportError:
+    FITSNE = None
+    from sklearn.manifold import TSNE
 
 
 def main():
@@ -42,14 +49,23 @@ def main():
 
     print('running tSNE...')
     start = time.time()
-    t = TSNE(n_components=2, perplexity=50).fit_transform(data_pca)
+    data_tsne = data_pca.astype(numpy.float32)
+    if FITSNE is not None:
+        t = FITSNE(n_components=2, perplexity=50,
+                   negative_gradient_method="fft", n_jobs=-1).fit(data_tsne)
+        t = numpy.asarray(t)
+    else:
+        t = TSNE(n_components=2, perplexity=50).fit_transform(data_tsne)
     end = time.time()
     print('done! ({:.1f}s total)'.format(end - start))
 
     print('running HDBSCAN on tSNE results...')
-    params = dict(min_cluster_size=15)
+    # the embedding is 2-D, so a KD-tree with multi-threaded core distance
+    # computation is much faster than the defaults.
+    params = dict(min_cluster_size=15, algorithm='boruvka_kdtree',
+                  core_dist_n_jobs=-1, approx_min_span_tree=True)
     start = time.time()
-    h = hdbscan.HDBSCAN(**params).fit_predict(t)
+    h = hdbscan.HDBSCAN(**params).fit_predict(t.astype(numpy.float32))
     end = time.time()
     print('done! ({:.1f}s total)'.format(end - start))
     print('got {} clusters'.format(max(h) + 1))
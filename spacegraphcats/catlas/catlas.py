@@ -7,13 +7,14 @@ import sys
 import tempfile
 import gzip
 import copy
-from .rdomset import rdomset, domination_graph
+import numpy as np
+from .rdomset import rdomset, domination_graph, parallel_domination_graph
 from .graph_io import read_from_gxt, write_to_gxt
-from .graph import Graph
+from .graph import Graph, DictGraph
 from spacegraphcats.utils.logging import log_command
 from io import TextIOWrapper
 from collections import defaultdict
-from typing import List, Dict, Set
+from typing import List, Dict, Set, Iterator
 
 UPPER_RADIUS = 1
 
@@ -21,16 +22,22 @@ UPPER_RADIUS = 1
 class Project(object):
     """Methods for coordinating whole projects."""
 
-    def __init__(self, directory, r, checkpoint=True):
+    def __init__(self, directory, r, checkpoint=True, processes=1,
+                 binary_checkpoint=False):
         """
         Make a project in directory at raidus r.
 
         This object stores the intermediate variables for the CAtlas building
-        so that they can be checkpointed as necessary.
+        so that they can be checkpointed as necessary.  When processes is
+        larger than 1, the components of each level are processed in
+        parallel.  When binary_checkpoint is set, checkpoints are written as
+        numpy arrays rather than gzipped text.
         """
         self.dir = directory
         self.r = r
         self.checkpoint = checkpoint
+        self.processes = processes
+        self.binary_checkpoint = binary_checkpoint
         self.graph = None
         self.idx = 0
         self.level = 1
@@ -78,12 +85,34 @@ class Project(object):
         if not self.checkpoint:
             raise IOError("I told you I didn't want to load from checkpoint!")
         print("Loading results of building level {}".format(level))
+        infile = self.cp_name(level)
+        # binary checkpoints are numpy .npz (i.e. zip) files; anything else
+        # is a gzipped text checkpoint
+        with open(infile, 'rb') as f:
+            is_binary = f.read(4) == b'PK\x03\x04'
+        if is_binary:
+            root = self._load_binary(infile)
+        else:
+            root = self._load_text(infile)
+
+        # the checkpointed CAtlas has a dummy root.  The nodes in the
+        # current level need to be removed from the root because we haven't
+        # finished constructing their parents.
+        unfinished_idx = -1*len(self.graph)
+        unfinished = root.children[unfinished_idx:]
+        root.children = root.children[:unfinished_idx]
+        self.level_nodes = {node.vertex: node for node in unfinished}
+        self.idx = root.idx
+        self.level = root.level - 1
+        self.root = root
+
+    def _load_text(self, infile):
+        """Read the graph and dummy root of a gzipped text checkpoint."""
         # the temp file contains catlas and graph information.  To use the
         # readers for catlas and graph, we need to temporarily split them into
         # separate files
         tmpf = tempfile.TemporaryFile(mode='r+')
 
-        infile = self.cp_name(level)
         with gzip.open(infile, 'rt') as f:
             # read until the end of the catlas
             for line in f:
@@ -98,31 +127,47 @@ class Project(object):
             tmpf.seek(0)
             root = CAtlas.read(tmpf)
             tmpf.close()
-
-            # the checkpointed CAtlas has a dummy root.  The nodes in the
-            # current level need to be removed from the root because we haven't
-            # finished constructing their parents.
-            unfinished_idx = -1*len(self.graph)
-            unfinished = root.children[unfinished_idx:]
-            root.children = root.children[:unfinished_idx]
-            self.level_nodes = {node.vertex: node for node in unfinished}
-            self.idx = root.idx
-            self.level = root.level - 1
-            self.root = root
+        return root
+
+    def _load_binary(self, infile):
+        """Read the graph and dummy root of a binary checkpoint."""
+        with np.load(infile) as arrays:
+            self.graph = DictGraph(r=UPPER_RADIUS)
+            for v in arrays["graph_nodes"].tolist():
+                self.graph.add_node(v)
+            for u, v in zip(arrays["graph_tails"].tolist(),
+                            arrays["graph_heads"].tolist()):
+                self.graph.add_arc(u, v)
+            return CAtlas.read_npz(arrays)
 
     def _save(self):
         """Method used by the thread to write out."""
         outfile = self.cp_name(self.level - 1)
         print("Writing to file {}".format(outfile))
-        with gzip.open(outfile, 'wt') as f:
-            # make a dummy root to write the catlas using catlas.write method
-            # we add all current level nodes as children of the root
-            root = CAtlas(self.idx, -1, self.level,
-                          copy.copy(self.root.children))
-            root.children.extend(self.level_nodes.values())
-            root.write(f)
-            f.write("###\n")
-            write_to_gxt(f, self.graph)
+        # make a dummy root to write the catlas using catlas.write method
+        # we add all current level nodes as children of the root
+        root = CAtlas(self.idx, -1, self.level,
+                      copy.copy(self.root.children))
+        root.children.extend(self.level_nodes.values())
+        if self.binary_checkpoint:
+            self._save_binary(outfile, root)
+        else:
+            # checkpoints are transient, so favor speed over compression
+            with gzip.open(outfile, 'wt', compresslevel=1) as f:
+                root.write(f)
+                f.write("###\n")
+                write_to_gxt(f, self.graph)
+
+    def _save_binary(self, outfile, root):
+        """Write the graph and dummy root as compressed numpy arrays."""
+        arcs = list(self.graph.arcs(1))
+        # DictGraph.arcs returns (head, tail) pairs
+        arrays = root.to_arrays()
+        arrays["graph_nodes"] = np.array(list(self.graph), dtype=np.int64)
+        arrays["graph_heads"] = np.array([x for x, _ in arcs], dtype=np.int64)
+        arrays["graph_tails"] = np.array([y for _, y in arcs], dtype=np.int64)
+        with open(outfile, 'wb') as f:
+            np.savez_compressed(f, **arrays)
 
     def save_checkpoint(self):
         """Write out a partial computation."""
@@ -136,6 +181,8 @@ class CAtlas(object):
     """Hierarchical atlas for querying graphs."""
 
     LEVEL_THRESHOLD = 10
+    # number of nodes to format before flushing to the output file in write()
+    WRITE_BATCH_SIZE = 8192
 
     def __init__(self, idx, vertex, level, children):
         """
@@ -171,7 +218,8 @@ class CAtlas(object):
                                                              r,
                                                              proj.level,
                                                              proj.idx,
-                                                             proj.level_nodes)
+                                                             proj.level_nodes,
+                                                             proj.processes)
 
             print("Catlas level {} complete".format(proj.level))
 
@@ -225,12 +273,16 @@ class CAtlas(object):
 
     @staticmethod
     def _build_level(graph: Graph, radius: int, level: int, min_id: int=0,
-                     prev_nodes: List[int]=None):
+                     prev_nodes: List[int]=None, processes: int=1):
         # find the domgraph of the current domgraph
-        domset = rdomset(graph, radius)
         # dominated maps dominating vertices to a list of the vertices they
         # optimally dominate
-        domgraph, dominated = domination_graph(graph, domset, radius)
+        if processes > 1:
+            domset, domgraph, dominated = \
+                parallel_domination_graph(graph, radius, processes)
+        else:
+            domset = rdomset(graph, radius)
+            domgraph, dominated = domination_graph(graph, domset, radius)
 
         # create the CAtlas nodes
         nodes = {}  # type: Dict[int, CAtlas]
@@ -245,76 +297,145 @@ class CAtlas(object):
 
         return nodes, domgraph, dominated
 
-    def leaves(self, visited: Set[object]=None) -> Set[object]:
+    def leaves(self, visited: bytearray=None) -> Set[object]:
         """Find the descendants of this node with no children."""
-        # this function is recursive so we need to keep track of nodes we
-        # already visited
+        return set(self.leaves_iter(visited))
+
+    def leaves_iter(self, visited: bytearray=None) -> Iterator[object]:
+        """
+        Iterate over the descendants of this node with no children, yielding
+        each of them once.
+        """
+        # walk the DAG with an explicit stack rather than recursing, so deep
+        # catlases can't hit the recursion limit and we don't build (and
+        # union) an intermediate set at every level.  We still need to keep
+        # track of nodes we already visited since subtrees can be shared;
+        # children always have smaller ids than their parents, so a flag
+        # per id up to our own is enough.
         if visited is None:
-            visited = set([self])
-        # base case is level 0
-        if self.level == 1:
-            return set([self])
-        # otherwise gather the leaves of the children
-        res = set()  # type: Set[object]
-        for c in self.children:
-            if c not in visited:
-                visited.add(c)
-                res |= c.leaves(visited)
-        return res
+            visited = bytearray(self.idx + 1)
+        visited[self.idx] = 1
+        stack = [self]
+        while stack:
+            curr = stack.pop()
+            # base case is level 1
+            if curr.level == 1:
+                yield curr
+                continue
+            # otherwise visit the children
+            for c in curr.children:
+                if not visited[c.idx]:
+                    visited[c.idx] = 1
+                    stack.append(c)
 
     def write(self, outfile: TextIOWrapper):
         """Write the connectivity of the CAtlas to file."""
         # doesn't matter how we traverse the graph, so we use DFS for ease of
         # implementation
         stack = [self]
-        seen = set()
+        # children always have smaller ids than their parents, so we can
+        # flag seen nodes by id rather than hashing the node objects
+        seen = bytearray(self.idx + 1)
+        seen[self.idx] = 1
+        # collect lines and write them out in large batches rather than
+        # issuing one write per node
+        buf = []  # type: List[str]
         while len(stack) > 0:
             # remove from the stack
             curr = stack.pop()
             # write node information
             child_str = " ".join(str(child.idx) for child in curr.children)
-            outfile.write("{},{},{},{}\n".format(curr.idx,
-                                                 curr.vertex,
-                                                 curr.level,
-                                                 child_str))
+            buf.append("{},{},{},{}\n".format(curr.idx,
+                                              curr.vertex,
+                                              curr.level,
+                                              child_str))
+            if len(buf) >= CAtlas.WRITE_BATCH_SIZE:
+                outfile.write("".join(buf))
+                buf.clear()
             # all nodes already seen don't get re-added
-            seen.add(curr)
-            stack.extend(filter(lambda x: x not in seen, curr.children))
+            for child in curr.children:
+                if not seen[child.idx]:
+                    seen[child.idx] = 1
+                    stack.append(child)
+        outfile.write("".join(buf))
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """
+        Return the connectivity of the CAtlas as numpy arrays.
+
+        Node i of the traversal has id idx[i], cDBG vertex vertex[i], level
+        level[i] and children indices[indptr[i]:indptr[i+1]].
+        """
+        idx = []  # type: List[int]
+        vertex = []  # type: List[int]
+        level = []  # type: List[int]
+        indptr = [0]
+        indices = []  # type: List[int]
+        # same traversal as write()
+        stack = [self]
+        seen = bytearray(self.idx + 1)
+        seen[self.idx] = 1
+        while len(stack) > 0:
+            curr = stack.pop()
+            idx.append(curr.idx)
+            vertex.append(curr.vertex)
+            level.append(curr.level)
+            indices.extend(child.idx for child in curr.children)
+            indptr.append(len(indices))
+            for child in curr.children:
+                if not seen[child.idx]:
+                    seen[child.idx] = 1
+                    stack.append(child)
+
+        return {"idx": np.array(idx, dtype=np.int64),
+                "vertex": np.array(vertex, dtype=np.int64),
+                "level": np.array(level, dtype=np.int64),
+                "indptr": np.array(indptr, dtype=np.int64),
+                "indices": np.array(indices, dtype=np.int64)}
+
+    @classmethod
+    def read_npz(cls, arrays):
+        """Load the catlas from the arrays produced by to_arrays."""
+        idx = arrays["idx"].tolist()
+        vertex = arrays["vertex"].tolist()
+        level = arrays["level"].tolist()
+        indptr = arrays["indptr"].tolist()
+        indices = arrays["indices"].tolist()
+
+        nodes = [None] * (max(idx) + 1)  # type: List[CAtlas]
+        for i, catlas_node in enumerate(idx):
+            nodes[catlas_node] = cls(catlas_node, vertex[i], level[i], [])
+
+        for i, catlas_node in enumerate(idx):
+            nodes[catlas_node].children = \
+                [nodes[c] for c in indices[indptr[i]:indptr[i+1]]]
+
+        return nodes[-1]
 
     @classmethod
     def read(cls, catlas_file):
         """Load the catlas Directed Acyclic Graph."""
-        children = []
-        nodes = []
+        rows = []
+        max_idx = -1
 
-        # load everything from the catlas file
+        # parse everything from the catlas file in a single pass
         for line in catlas_file:
-            catlas_node, cdbg_node, level, beneath = line.strip().split(',')
+            catlas_node, cdbg_node, level, beneath = line.split(',')
 
-            level = int(level)
             catlas_node = int(catlas_node)
-            cdbg_node = int(cdbg_node)
-
-            # extend arrays as necessary
-            if len(children) <= catlas_node:
-                for i in range(catlas_node - len(children) + 1):
-                    children.append([])
-                    nodes.append(None)
-
-            # parse out the children
-            beneath = beneath.strip()
-            if beneath:
-                beneath = beneath.split(' ')
-                children[catlas_node].extend(map(int, beneath))
+            rows.append((catlas_node, int(cdbg_node), int(level),
+                         beneath.split()))
+            if catlas_node > max_idx:
+                max_idx = catlas_node
 
-            # make the new node with empty children
-            node = cls(catlas_node, cdbg_node, level, [])
-            nodes[catlas_node] = node
+        # node ids are 0,1,...,n-1 so we can allocate all of them up front
+        nodes = [None] * (max_idx + 1)  # type: List[CAtlas]
+        for catlas_node, cdbg_node, level, _ in rows:
+            nodes[catlas_node] = cls(catlas_node, cdbg_node, level, [])
 
         # update the nodes with pointers to their children
-        for i, n in enumerate(nodes):
-            for child in children[n.idx]:
-                n.children.append(nodes[child])
+        for catlas_node, _, _, beneath in rows:
+            nodes[catlas_node].children = [nodes[int(c)] for c in beneath]
 
         return nodes[-1]
 
@@ -326,9 +447,11 @@ def main(args):
     proj_dir = args.project
     checkpoint = not args.no_checkpoint
     level = args.level
+    processes = args.processes
+    binary_checkpoint = args.binary_checkpoint
 
     # make checkpoint
-    proj = Project(proj_dir, r, checkpoint)
+    proj = Project(proj_dir, r, checkpoint, processes, binary_checkpoint)
 
     print("reading graph")
     if level:
@@ -348,7 +471,7 @@ def main(args):
     
     print("catlas built")
     print("writing graph")
-    with open(proj.catlasfilename, 'w') as cfile:
+    with open(proj.catlasfilename, 'w', buffering=1024*1024) as cfile:
         cat.write(cfile)
 
     return 0
@@ -364,6 +487,12 @@ if __name__ == "__main__":
     parser.add_argument("-l", "--level", type=int,
                         help="Level at which to load the checkpoint."
                         "Defaults to highest level saved when not invoked.")
+    parser.add_argument("-b", "--binary_checkpoint", action='store_true',
+                        help="Write checkpoints as numpy arrays rather "
+                        "than gzipped text")
+    parser.add_argument("-p", "--processes", type=int, default=1,
+                        help="Number of processes to use when building "
+                        "each level (default: 1)")
     args = parser.parse_args()
 
     exit_val = main(args)
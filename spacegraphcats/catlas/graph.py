@@ -4,6 +4,7 @@ from collections import defaultdict
 
 from typing import Callable, List, Tuple, Set, Iterable, Any, Sized
 
+import numpy
 from sortedcontainers import SortedSet
 
 class Graph(Iterable, Sized):
@@ -39,6 +40,11 @@ class Graph(Iterable, Sized):
         self.inarcs_by_weight[weight-1][v].add(u)
         return self
 
+    def add_arcs_to(self, v: int, us: Iterable[int], weight: int=1):
+        """Add the arcs uv for every u in us at a given weight."""
+        self.inarcs_by_weight[weight-1][v].update(us)
+        return self
+
     def remove_arc(self, u: int, v: int):
         """
         Remove arc uv from the graph.
@@ -51,6 +57,25 @@ class Graph(Iterable, Sized):
                 return self
         return self
 
+    def remove_arcs_to(self, v: int, us: List[int]):
+        """
+        Remove the arcs uv for every u in us from the graph.
+
+        Precondition/assumption:  each arc uv has a unique weight
+        """
+        for arc_list in self.inarcs_by_weight:
+            arcs = arc_list[v]
+            if not arcs:
+                continue
+            # difference_update rebuilds the whole set, which only pays off
+            # once we're removing more than a handful of arcs
+            if len(us) > 8:
+                arcs.difference_update(us)
+            else:
+                for u in us:
+                    arcs.discard(u)
+        return self
+
     def adjacent(self, u: int, v: int):
         """Check if uv or vu is an arc."""
         for arc_list in self.inarcs_by_weight:
@@ -95,6 +120,32 @@ class Graph(Iterable, Sized):
         """Return the total number of arcs in this graph."""
         return sum(self.in_degree(v, weight) for v in self)
 
+    def csr(self, weight: int=1):
+        """
+        Return a compressed sparse row snapshot of the arcs of a given weight.
+
+        Returns numpy arrays (nodes, indptr, indices) where nodes lists the
+        vertices in iteration order and the in-neighbors of nodes[i] are
+        nodes[indices[indptr[i]:indptr[i+1]]], in sorted order.
+        """
+        n = len(self)
+        nodes = numpy.fromiter(self, dtype=numpy.int64, count=n)
+        rows = [self.in_neighbors(v, weight) for v in self]
+        indptr = numpy.zeros(n + 1, dtype=numpy.int64)
+        numpy.cumsum(numpy.fromiter(map(len, rows), dtype=numpy.int64,
+                                    count=n), out=indptr[1:])
+
+        neighbors = numpy.fromiter(itertools.chain.from_iterable(rows),
+                                   dtype=numpy.int64, count=indptr[-1])
+        # vertices are iterated in sorted order, so we can binary search for
+        # the position of each neighbor -- unless they're just 0..n-1.
+        if n and nodes[-1] == n - 1:
+            indices = neighbors
+        else:
+            indices = numpy.searchsorted(nodes, neighbors)
+
+        return nodes, indptr, indices
+
     def transitive_pairs(self, u: int, w: int):
         """Return transitive pairs (x,u) whose weight sum is exactly w."""
         # loop over all weights that sum to w
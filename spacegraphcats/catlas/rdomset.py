@@ -1,12 +1,26 @@
 """Algorithms for r-dominating set computation."""
-from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from .graph import Graph, DictGraph
+from .components import components
 
-from typing import List, Set, Dict, Any, Union
+from typing import List, Set, Dict, Any
+from array import array
+import heapq
 import itertools
 
+import numpy
 from sortedcontainers import SortedSet, SortedDict
 
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# below this many vertices it isn't worth snapshotting the graph into arrays
+# (or paying for numba's compilation) to run the orientation, domset and
+# dominator assignment loops compiled
+MIN_NUMBA_NODES = 10000
+
 
 def low_degree_orientation(graph: Graph):
     """
@@ -16,16 +30,79 @@ def low_degree_orientation(graph: Graph):
     and orienting the edges towards it.
 
     Precondition:  every edge in the component has a corresponding arc in the
-    anti-parallel direction (i.e. uv and vu are in the graph)
+    anti-parallel direction (i.e. uv and vu are in the graph) and all arcs
+    have weight 1
     """
     # number of vertices (needed for print statements)
     n = len(graph)
-    # most elegant way to handle possibly empty graph (from the frat graph)
+    # most elegant way to handle possibly empty graph
     if n == 0:
         return
+
+    # the graph's vertices and their in-neighbors, in CSR form; the
+    # in-neighbors are indices into nodes
+    nodes, indptr, indices = ldo_csr(graph)
+    # the position at which each vertex gets removed
+    location = ldo_removal_order(indptr, indices)
+
+    # orient each edge towards the endpoint that was removed first, by
+    # deleting the arcs into v from vertices removed before it.  We pick
+    # those arcs out of the CSR arrays all at once, so the loop below only
+    # has to hand each vertex its slice.
+    location = numpy.asarray(location)
+    indices = numpy.asarray(indices, dtype=numpy.int64)
+    heads = numpy.repeat(numpy.arange(n), numpy.diff(indptr))
+    earlier = location[indices] < location[heads]
+    removed = numpy.asarray(nodes)[indices[earlier]].tolist()
+    ends = numpy.cumsum(numpy.bincount(heads[earlier], minlength=n)).tolist()
+
+    remove_arcs_to = graph.remove_arcs_to
+    start = 0
+    for v, end in zip(nodes, ends):
+        if end != start:
+            remove_arcs_to(v, removed[start:end])
+            start = end
+
+
+def ldo_csr(graph: Graph):
     """
-    compute necessary data structures for low degree orientation
+    Snapshot the in-neighbors of the vertices of graph in CSR form.
+
+    The vertices are relabelled 0..n-1, in iteration order, so that the
+    orientation can keep everything in plain lists indexed by vertex rather
+    than in dictionaries keyed by vertex id.  Returns the lists (nodes,
+    indptr, indices): the in-neighbors of nodes[i] are the vertices
+    nodes[j] for j in indices[indptr[i]:indptr[i+1]].
     """
+    n = len(graph)
+
+    nodes = list(graph)
+    rows = [graph.in_neighbors(v, 1) for v in nodes]
+    indptr = [0]
+    indptr.extend(itertools.accumulate(map(len, rows)))
+    indices = list(itertools.chain.from_iterable(rows))
+    del rows
+    # vertices of a Graph are already labelled 0..n-1
+    if nodes[-1] != n - 1:
+        label = {v: i for i, v in enumerate(nodes)}
+        indices = [label[u] for u in indices]
+
+    return nodes, indptr, indices
+
+
+def ldo_removal_order(indptr: List[int], indices: List[int]) -> List[int]:
+    """
+    Iteratively remove a vertex of minimum degree from a symmetric graph in
+    CSR form (see ldo_csr()), and return the position at which each vertex
+    was removed.
+
+    A low degree orientation orients every edge towards the endpoint that
+    was removed first.
+    """
+    n = len(indptr) - 1
+    if numba is not None and n >= MIN_NUMBA_NODES:
+        return _ldo_removal_order_csr(indptr, indices)
+
     # array binning the vertices by remaining degree
     (bins,
         # pointers to the first vertex with a given degree
@@ -33,33 +110,70 @@ def low_degree_orientation(graph: Graph):
         # remaining degree of the vertex
         degrees,
         # pointer to the location of a vertex in bins
-        location) = ldo_setup(graph)
+        location) = ldo_setup(indptr)
+    # the loop does scalar lookups, which are much cheaper on lists than on
+    # numpy arrays
+    bins, bin_starts = bins.tolist(), bin_starts.tolist()
+    degrees, location = degrees.tolist(), location.tolist()
+
+    # run the loop once per vertex.  We report progress every 1% of the
+    # vertices, so we go through them in blocks of that size to keep the
+    # check out of the per-vertex loop.
+    step = n//100 or n
+    for start in range(0, n, step):
+        end = min(start + step, n)
+        _remove_vertices(indptr, indices, bins, bin_starts, degrees, location,
+                         start, end)
+        print("removed {} of {} nodes\r".format(end, n), end="")
+    print("removed {} of {} nodes".format(n, n))
+
+    return location
+
+
+def _ldo_removal_order_csr(indptr, indices) -> List[int]:
+    """
+    Compute the same removal order as ldo_removal_order(), but in a single
+    pass over numpy arrays so that the loop can be compiled with numba.
+    """
+    n = len(indptr) - 1
+    bins, bin_starts, degrees, location = ldo_setup(indptr)
+    _remove_vertices_compiled(numpy.asarray(indptr, dtype=numpy.int64),
+                              numpy.asarray(indices, dtype=numpy.int64),
+                              bins, bin_starts, degrees, location, 0, n)
+    print("removed {} of {} nodes".format(n, n))
+
+    return location.tolist()
+
 
-    checkpoint = 0
-    # run the loop once per vertex
-    for curr in range(n):
-        # curr points the vertex of minimum degree
+def _remove_vertices(indptr, indices, bins, bin_starts, degrees, location,
+                     start, end):
+    """
+    Remove the vertices at positions start..end-1 of the degree ordering,
+    updating bins, bin_starts, degrees and location in place (see
+    ldo_removal_order()).
+    """
+    for curr in range(start, end):
+        # curr points the vertex of minimum degree, so location[v] == curr
         v = bins[curr]
-        d_v = degrees[v]
-        # "move" v into bin 0 if it isn't there
-        if d_v > 0:
-            for i in range(d_v, 0, -1):
-                bin_starts[i] += 1
+        # "move" v into bin 0.  Rather than bumping bin_starts for every
+        # degree up to v's, which makes this loop O(n * max degree), we
+        # leave the entries of the (now empty) bins below v's degree
+        # behind and clamp them when they're read: any bin starting at or
+        # before curr really starts at curr + 1.
         degrees[v] = 0
-        # decrement the degrees of the in neighbors not yet removed and orient
-        # edges towards in neighbors already removed
-        inbrs = list(graph.in_neighbors(v, 1))
-        for u in inbrs:
-            d_u = degrees[u]
+        # decrement the degrees of the in neighbors not yet removed.
+        # Vertices that have been removed never move again, so once we're
+        # done location is the removal order.
+        for u in indices[indptr[v]:indptr[v+1]]:
             loc_u = location[u]
-            # if we've removed u, we orient the arc towards u by deleting uv
-            if location[u] < location[v]:
-                graph.remove_arc(u, v)
-            # otherwise, the effective degree of u should drop by 1
-            else:
+            # the effective degree of u should drop by 1
+            if loc_u > curr:
+                d_u = degrees[u]
                 # swap u with w, the first vertex with the same degree
                 # find where w is
                 loc_w = bin_starts[d_u]
+                if loc_w <= curr:
+                    loc_w = curr + 1
                 w = bins[loc_w]
                 # swap their positions
                 if w != u:
@@ -68,61 +182,69 @@ def low_degree_orientation(graph: Graph):
                     location[w] = loc_u
                     location[u] = loc_w
                 # move the bin start one place over
-                bin_starts[d_u] += 1
+                bin_starts[d_u] = loc_w + 1
                 # decrement u's degree
                 degrees[u] = d_u - 1
-        if curr == checkpoint:
-            print("removed {} of {} nodes\r".format(curr+1, n), end="")
-            checkpoint += n//100
-    print("removed {} of {} nodes".format(curr+1, n))
 
 
-def ldo_setup(graph: Graph):
-    """Setup data structure for low degree orientation."""
-    n = len(graph)
+# ldo_removal_order() runs _remove_vertices() itself on lists, so we keep the
+# plain Python version around and compile a copy for the numpy arrays
+if numba is not None:
+    _remove_vertices_compiled = numba.njit(cache=True)(_remove_vertices)
+else:
+    _remove_vertices_compiled = _remove_vertices
 
-    degrees = None  # type: Union[Dict[int, int], List[int]]
-    location = None  # type: Union[Dict[int, int], List[int]]
-    max_deg = 0
 
-    # hack-y way to know whether our location and degree lookups should be
-    # lists or dictionaries
-    if isinstance(graph, DictGraph):
-        # degree lookup
-        degrees = {v: graph.in_degree(v) for v in graph}
-        # pointer to place in vertex ordering
-        location = {v: None for v in graph}
-        max_deg = max(degrees.values())
-
-    else:
-        degrees = [graph.in_degree(v) for v in graph]
-        location = [None for _ in graph]
-        max_deg = max(degrees)
+def ldo_setup(indptr: List[int]):
+    """
+    Setup data structure for low degree orientation.
 
-    # precompute the degrees of each vertex and make a bidirectional lookup
-    degree_counts = [0 for i in range(max_deg+1)]
-    for v in graph:
-        d = degrees[v]
-        degree_counts[d] += 1
+    Buckets the vertices of a graph in CSR form (see ldo_csr()) by degree
+    and returns bins, bin_starts, degrees and location (see
+    ldo_removal_order()).
+    """
+    # degree lookup
+    degree_array = numpy.diff(numpy.asarray(indptr, dtype=numpy.int64))
+    n = len(degree_array)
+
+    # bucket the vertices by degree with a single sort.  The sort is
+    # stable, so vertices of the same degree stay in label order.
+    bins = numpy.argsort(degree_array, kind='stable')
+    # pointer to place in vertex ordering
+    location = numpy.empty(n, dtype=numpy.int64)
+    location[bins] = numpy.arange(n)
     # assign the cutoffs of bins
-    bin_starts = [sum(degree_counts[:i]) for i in range(max_deg+1)]
-    del degree_counts
-    bin_ptrs = list(bin_starts)
-    bins = [None for _ in graph]  # type: List[int]
-
-    # assign the vertices to bins
-    checkpoint = 0
-    for i, v in enumerate(graph):
-        loc = bin_ptrs[degrees[v]]
-        bins[loc] = v
-        location[v] = loc
-        bin_ptrs[degrees[v]] += 1
-        if v == checkpoint:
-            print("bucketed {} of {} nodes\r".format(i+1, n), end="")
-            checkpoint += n//100
-    del bin_ptrs
-    print("bucketed {} of {} nodes".format(i+1, n))
-    return bins, bin_starts, degrees, location
+    degree_counts = numpy.bincount(degree_array)
+    bin_starts = numpy.zeros(len(degree_counts), dtype=numpy.int64)
+    numpy.cumsum(degree_counts[:-1], out=bin_starts[1:])
+    print("bucketed {} of {} nodes".format(n, n))
+
+    return bins, bin_starts, degree_array, location
+
+
+def fraternal_csr(edges: List[int], m: int):
+    """
+    Build a symmetric graph in CSR form (see ldo_csr()) from a list of
+    edges, dropping repeated ones.  Each edge xy with x < y < m is encoded
+    as the single integer x * m + y.  Returns numpy arrays (nodes, indptr,
+    indices).
+    """
+    codes = numpy.unique(numpy.asarray(edges, dtype=numpy.int64))
+    xs, ys = numpy.divmod(codes, m)
+    del codes
+    nodes = numpy.unique(numpy.concatenate((xs, ys)))
+    k = len(nodes)
+    xs = numpy.searchsorted(nodes, xs)
+    ys = numpy.searchsorted(nodes, ys)
+    # now add every edge in both directions, encoded the same way relative
+    # to the new labels, so one sort groups the arcs by head with the tails
+    # of each head in sorted order
+    arcs = numpy.concatenate((ys * k + xs, xs * k + ys))
+    arcs.sort()
+    heads, indices = numpy.divmod(arcs, k)
+    indptr = numpy.zeros(k + 1, dtype=numpy.int64)
+    numpy.cumsum(numpy.bincount(heads, minlength=k), out=indptr[1:])
+    return nodes, indptr, indices
 
 
 def dtf_step(graph: Graph, dist):
@@ -133,9 +255,6 @@ def dtf_step(graph: Graph, dist):
     must be a (d-1)-th dtf-augmentation. See dtf() for usage.
     This function adds arcs to graph.
     """
-    fratGraph = DictGraph()
-    # Records fraternal edges, must be oriented at the end
-
     trans_pairs = 0
     # pick out the transitive pairs from v and add them as new edges
     for v in graph:
@@ -146,19 +265,30 @@ def dtf_step(graph: Graph, dist):
     # pick out the fraternal pairs from v and store them.  We do this after
     # adding transitive edges to guarantee that no fraternal edge conflicts
     # with a transitive edge
+    # Records fraternal edges, must be oriented at the end.  Many of them are
+    # found from both ends, so we store each one as a single integer encoding
+    # its endpoints in sorted order (see fraternal_csr())
+    m = max(graph, default=-1) + 1
+    frat_edges = array('q')
     for v in graph:
         for x, y in graph.fraternal_pairs(v, dist):
             # assert x != y
-            fratGraph.add_node(x)
-            fratGraph.add_node(y)
-            fratGraph.add_arc(x, y)
-            fratGraph.add_arc(y, x)
-    print("added {} fraternal edges".format(fratGraph.num_arcs()//2))
-
-    # Orient fraternal edges and add them to the graph
-    low_degree_orientation(fratGraph)
+            frat_edges.append(x * m + y if x < y else y * m + x)
+    nodes, indptr, indices = fraternal_csr(frat_edges, m)
+    del frat_edges
+    print("added {} fraternal edges".format(len(indices)//2))
+    # most elegant way to handle possibly empty frat graph
+    if len(nodes) == 0:
+        return
 
-    for s, t in fratGraph.arcs(1):
+    # Orient fraternal edges and add them to the graph.  Each edge becomes
+    # an arc from the endpoint removed first to the one removed later.
+    location = numpy.array(ldo_removal_order(indptr.tolist(),
+                                             indices.tolist()))
+    heads = numpy.repeat(numpy.arange(len(nodes)), numpy.diff(indptr))
+    later = location[indices] > location[heads]
+    for s, t in zip(nodes[heads[later]].tolist(),
+                    nodes[indices[later]].tolist()):
         # assert s != t
         graph.add_arc(s, t, dist)
 
@@ -193,75 +323,199 @@ def dtf(graph: Graph, radius: int):
         d += 1
 
 
+def _snapshot_neighbors(graph: Graph, weight: int):
+    """
+    Copy the neighbors of each vertex of graph along arcs of a given weight,
+    in either direction, into plain lists: first its in-neighbors in sorted
+    order, then its out-neighbors in sorted order.
+
+    Walking a SortedSet is several times slower than walking a list, and
+    once the arcs have been oriented we can't find out-neighbors without a
+    scan of the whole graph, so routines that need to walk the edges take
+    one snapshot up front and iterate that instead.
+    """
+    in_neighbors = {v: list(graph.in_neighbors(v, weight)) for v in graph}
+    neighbors = {v: in_v[:] for v, in_v in in_neighbors.items()}
+    for v, in_v in in_neighbors.items():
+        for u in in_v:
+            neighbors[u].append(v)
+    return neighbors
+
+
 def compute_domset(graph: Graph, radius: int):
     """
     Compute a d-dominating set using Dvorak's approximation algorithm
     for dtf-graphs (see `Structural Sparseness and Complex Networks').
     Graph needs a distance-d dtf augmentation (see rdomset() for usage).
     """
-    domset = SortedSet()
+    if numba is not None and len(graph) >= MIN_NUMBA_NODES:
+        return _compute_domset_csr(graph, radius)
+
+    # vertices are only ever added to the domset once, and a vertex is in the
+    # domset exactly when its domdistance is 0, so we collect them in a list
+    # and only sort them at the end rather than keeping a SortedSet up to date
+    domset = []  # type: List[int]
     infinity = float('inf')
+    # the per-vertex values below are kept in lists indexed by vertex id,
+    # which are quicker to index than dictionaries (vertex ids are small
+    # non-negative integers, even if they needn't be 0..n-1)
+    size = max(graph, default=-1) + 1
     # minimum distance to a dominating vertex, obviously infinite at start
-    domdistance = defaultdict(lambda: infinity)  # type: Dict[int, float]
+    domdistance = [infinity] * size  # type: List[float]
     # counter that keeps track of how many neighbors have made it into the
     # domset
-    domcounter = defaultdict(int)  # type: Dict[int, int]
+    domcounter = [0] * size  # type: List[int]
     # cutoff for how many times a vertex needs to have its neighbors added to
     # the domset before it does.  We choose radius^2 as a convenient "large"
     # number
     c = (2*radius)**2
 
-    # Sort the vertices by indegree so we take fewer vertices
-    order = sorted([v for v in graph], key=lambda x: graph.in_degree(x),
-                   reverse=True)
-    # vprops = [(v,graph.in_degree(v)) for v in nodes]
-    # vprops.sort(key=itemgetter(1),reverse=False)
-    # order = map(itemgetter(0),vprops)
+    # Sort the vertices by indegree so we take fewer vertices.  The sort is
+    # stable, so vertices of the same indegree stay in iteration order.
+    nodes = list(graph)
+    in_degrees = numpy.zeros(len(nodes), dtype=numpy.int64)
+    for r in range(1, graph.radius + 1):
+        in_degrees += numpy.fromiter((len(graph.in_neighbors(v, r))
+                                      for v in nodes),
+                                     dtype=numpy.int64, count=len(nodes))
+    order = [nodes[i]
+             for i in numpy.argsort(-in_degrees, kind='stable').tolist()]
 
     for v in order:
-        # look at the in neighbors to update the distance
+        # look at the in neighbors to update the distance.  An arc of weight
+        # r can't bring v any closer than r to the domset, so we can stop as
+        # soon as v is at most that far away (in particular right away if v
+        # was already put in the domset)
+        dist = domdistance[v]
+        # keep the (u, r) in-arcs we read, in case v goes into the domset and
+        # we need to walk them again
+        in_arcs = []
         for r in range(1, radius + 1):
+            if dist <= r:
+                break
             for u in graph.in_neighbors(v, r):
-                domdistance[v] = min(domdistance[v], r+domdistance[u])
+                in_arcs.append((u, r))
+                dist = min(dist, r+domdistance[u])
+        domdistance[v] = dist
 
         # if v is already dominated at radius, no need to work
-        if domdistance[v] <= radius:
+        if dist <= radius:
             continue
 
         # if v is not dominated at radius, put v in the dominating set
-        domset.add(v)
+        domset.append(v)
         domdistance[v] = 0
 
         # update distances of neighbors of v if v is closer if u has had too
-        # many of its neighbors taken into the domset, include it too.
-        for r in range(1, graph.radius + 1):
-            for u in graph.in_neighbors(v, r):
-                domcounter[u] += 1
-                domdistance[u] = min(domdistance[u], r)
-                if domcounter[u] > c and u not in domset:
-                    # add u to domset
-                    domset.add(u)
-                    domdistance[u] = 0
-                    for x, rx in graph.in_neighbors(u):
-                        domdistance[x] = min(domdistance[x], rx)
-                # only need to update domdistance if u didn't get added
+        # many of its neighbors taken into the domset, include it too.  We
+        # only get here if we read all of v's in-arcs up to radius above.
+        for r in range(radius + 1, graph.radius + 1):
+            in_arcs.extend((u, r) for u in graph.in_neighbors(v, r))
+        for u, r in in_arcs:
+            domcounter[u] += 1
+            domdistance[u] = min(domdistance[u], r)
+            if domcounter[u] > c and domdistance[u] > 0:
+                # add u to domset
+                domset.append(u)
+                domdistance[u] = 0
+                for x, rx in graph.in_neighbors(u):
+                    domdistance[x] = min(domdistance[x], rx)
+            # only need to update domdistance if u didn't get added
+
+    return SortedSet(domset)
+
+
+
+def _compute_domset_csr(graph: Graph, radius: int):
+    """
+    Compute the same d-dominating set as compute_domset(), but on a CSR
+    snapshot of the graph so that the sweep can be compiled with numba.
+    """
+    csrs = [graph.csr(r) for r in range(1, graph.radius + 1)]
+    nodes = csrs[0][0]
+    n = len(nodes)
+
+    # merge the arcs of all weights, keeping each vertex's in-arcs ordered by
+    # weight (and by in-neighbor within a weight), as compute_domset() reads
+    # them
+    heads = numpy.concatenate([numpy.repeat(numpy.arange(n), numpy.diff(ip))
+                               for _, ip, _ in csrs])
+    order = numpy.argsort(heads, kind='stable')
+    indices = numpy.concatenate([ix for _, _, ix in csrs])[order]
+    weights = numpy.concatenate([numpy.full(len(ix), r, dtype=numpy.int64)
+                                 for r, (_, _, ix) in enumerate(csrs, 1)])
+    weights = weights[order]
+    indptr = numpy.zeros(n + 1, dtype=numpy.int64)
+    numpy.cumsum(numpy.bincount(heads, minlength=n), out=indptr[1:])
+
+    # same order as compute_domset(): by indegree, ties in label order
+    order = numpy.argsort(-numpy.diff(indptr), kind='stable')
+    members = _sweep_domset(indptr, indices, weights, order, radius,
+                            (2*radius)**2)
+
+    return SortedSet(nodes[members].tolist())
+
+
+def _sweep_domset(indptr, indices, weights, order, radius, c):
+    """
+    Sweep over the vertices of a CSR graph in the given order and return
+    the positions of the vertices put in the domset; see compute_domset().
+    The in-arcs of each vertex must be ordered by weight.
+    """
+    n = len(indptr) - 1
+    domdistance = numpy.full(n, numpy.inf)
+    domcounter = numpy.zeros(n, dtype=numpy.int64)
+    domset = numpy.empty(n, dtype=numpy.int64)
+    size = 0
 
-    return domset
+    for v in order:
+        # the arcs are ordered by weight, so we can stop at the first one
+        # that is too heavy to be read or to bring v any closer
+        dist = domdistance[v]
+        for k in range(indptr[v], indptr[v+1]):
+            r = weights[k]
+            if r > radius or dist <= r:
+                break
+            dist = min(dist, r + domdistance[indices[k]])
+        domdistance[v] = dist
+
+        if dist <= radius:
+            continue
 
+        domset[size] = v
+        size += 1
+        domdistance[v] = 0
+        for k in range(indptr[v], indptr[v+1]):
+            u = indices[k]
+            domcounter[u] += 1
+            domdistance[u] = min(domdistance[u], weights[k])
+            if domcounter[u] > c and domdistance[u] > 0:
+                domset[size] = u
+                size += 1
+                domdistance[u] = 0
+                for j in range(indptr[u], indptr[u+1]):
+                    x = indices[j]
+                    domdistance[x] = min(domdistance[x], weights[j])
 
-def domination_graph(graph: Graph, domset: Set[int], radius: int):
-    """
-    Build up a 'domination graph' by assigning each vertex to one of its
-    closest dominators, then preserving edges between vertices assigned to
-    different dominators.  This means the domination graph is a shallow minor
-    (at radius radius) of the original graph.
+    return domset[:size]
+
+
+if numba is not None:
+    _sweep_domset = numba.njit(cache=True)(_sweep_domset)
+
+
+def _assign_dominators(graph: Graph, domset: Set[int], radius: int):
     """
-    print("assigning to dominators")
-    domgraph = DictGraph(nodes=SortedSet(domset))
+    Assign each vertex of graph to one of its closest dominators.
 
+    Returns a list mapping each vertex id to the dominator it is assigned;
+    ids that aren't vertices of graph map to -1.
+    """
     # We need to assign each vertex to a unique closest dominator.  A value of
     # -1 indicates this vertex has not yet been assigned to a dominator.
-    assigned_dominator = {v: -1 for v in graph}  # type: Dict[int, int]
+    # Vertex ids are small non-negative integers, so we can keep this in a
+    # list indexed by vertex rather than in a dictionary.
+    assigned_dominator = [-1] * (max(graph, default=-1) + 1)  # type: List[int]
     # domset vertices are closest to themselves
     for v in domset:
         assigned_dominator[v] = v
@@ -269,42 +523,148 @@ def domination_graph(graph: Graph, domset: Set[int], radius: int):
     # If we compute all closest dominators and arbitrarily pick a unique one
     # from the list, the vertices assigned to a particular dominator
     # (including the dominator itself) might not induce a connected subgraph.
-    # Thus we need to propagate the domination assignments outwards so a
-    # vertex at distance d from a dominator has to wait until its neighbors at
-    # distance d-1 are assigned in order to pick an appropriate assignment (a
-    # dominator already found in its neighborhood).
+    # Thus we grow the assignments outwards from the dominators one distance
+    # at a time (a breadth-first search from all of them at once), so a
+    # vertex at distance d from the domset takes the dominator of the first
+    # neighbor at distance d-1 that reaches it.  The arcs are oriented by
+    # now, so we need to walk them in both directions.
+    neighbors = _snapshot_neighbors(graph, 1)
+    frontier = list(domset)
     for _ in range(radius):
-        for v in graph:
+        next_frontier = []
+        for v in frontier:
             label = assigned_dominator[v]
-            if label >= 0:
-                # Push value to unassigned in-neighbors
-                for u in graph.in_neighbors(v, 1):
-                    if assigned_dominator[u] < 0:
-                        assigned_dominator[u] = label
-            else:
-                # Pull value
-                for u in graph.in_neighbors(v, 1):
-                    # TODO: could instead use some min/max voting here
-                    if assigned_dominator[u] >= 0:
-                        assigned_dominator[v] = assigned_dominator[u]
-                        break
+            for u in neighbors[v]:
+                if assigned_dominator[u] < 0:
+                    assigned_dominator[u] = label
+                    next_frontier.append(u)
+        frontier = next_frontier
+
+    # Sanity-check
+    for v in graph:
+        assert assigned_dominator[v] >= 0
+
+    return assigned_dominator
+
+
+def _assign_dominators_csr(graph: Graph, domset: Set[int], radius: int):
+    """
+    Assign each vertex of graph to one of its closest dominators, as
+    _assign_dominators() does, but on a CSR snapshot of the graph so that
+    the search can be compiled with numba.
+    """
+    nodes, indptr, indices = graph.csr(1)
+    n = len(nodes)
+
+    # add the reverse of every arc, keeping each vertex's in-neighbors ahead
+    # of its out-neighbors so we visit them in the same order as
+    # _assign_dominators()
+    rows = numpy.repeat(numpy.arange(n), numpy.diff(indptr))
+    heads = numpy.concatenate((rows, indices))
+    tails = numpy.concatenate((indices, rows))
+    neighbors = tails[numpy.argsort(heads, kind='stable')]
+    offsets = numpy.zeros(n + 1, dtype=numpy.int64)
+    numpy.cumsum(numpy.bincount(heads, minlength=n), out=offsets[1:])
+
+    domset_array = numpy.fromiter(domset, dtype=numpy.int64, count=len(domset))
+    sources = numpy.searchsorted(nodes, domset_array)
+    assigned = numpy.full(n, -1, dtype=numpy.int64)
+    assigned[sources] = domset_array
+    # the search queue, starting from the dominators; every vertex is queued
+    # at most once
+    queue = numpy.empty(n, dtype=numpy.int64)
+    queue[:len(sources)] = sources
+
+    _propagate_dominators(offsets, neighbors, assigned, queue, len(sources),
+                          radius)
+
     # Sanity-check
-    for v, value in enumerate(assigned_dominator):
-        assert value >= 0
+    assert (assigned >= 0).all()
+
+    # spread the assignments out into a list indexed by vertex id
+    assigned_dominator = numpy.full(nodes[-1] + 1 if n else 0, -1,
+                                    dtype=numpy.int64)
+    assigned_dominator[nodes] = assigned
+    return assigned_dominator.tolist()
+
+
+def _propagate_dominators(indptr, indices, assigned, queue, num_sources,
+                          radius):
+    """
+    Propagate dominator assignments outwards from the first num_sources
+    vertices of queue along the arcs of a CSR graph, one distance at a time;
+    see _assign_dominators().
+    """
+    start, end = 0, num_sources
+    for _ in range(radius):
+        tail = end
+        for i in range(start, end):
+            v = queue[i]
+            label = assigned[v]
+            for k in range(indptr[v], indptr[v+1]):
+                u = indices[k]
+                if assigned[u] < 0:
+                    assigned[u] = label
+                    queue[tail] = u
+                    tail += 1
+        start, end = end, tail
+
+
+if numba is not None:
+    _propagate_dominators = numba.njit(cache=True)(_propagate_dominators)
+
+
+def domination_graph(graph: Graph, domset: Set[int], radius: int):
+    """
+    Build up a 'domination graph' by assigning each vertex to one of its
+    closest dominators, then preserving edges between vertices assigned to
+    different dominators.  This means the domination graph is a shallow minor
+    (at radius radius) of the original graph.
+    """
+    print("assigning to dominators")
+    domgraph = DictGraph(nodes=SortedSet(domset))
+
+    if numba is not None and len(graph) >= MIN_NUMBA_NODES:
+        assigned_dominator = _assign_dominators_csr(graph, domset, radius)
+    else:
+        assigned_dominator = _assign_dominators(graph, domset, radius)
 
     # Compute domgraph edges
     print("computing domgraph edges")
-    for u, v in graph.arcs(1):
-        du, dv = assigned_dominator[u], assigned_dominator[v]
-        assert du in domset and dv in domset
-        if du != dv:
-            domgraph.add_arc(du, dv)
-            domgraph.add_arc(dv, du)
-
-    # map of dominators to vertices they dominate
-    dominated = SortedDict({x: SortedSet() for x in domset})  # type: Dict[int, Set[int]]
-    for v, x in assigned_dominator.items():
-        dominated[x].add(v)
+    # look up the dominators at both ends of every arc at once, on a CSR
+    # snapshot of the graph
+    nodes, indptr, indices = graph.csr(1)
+    dominators = numpy.asarray(assigned_dominator, dtype=numpy.int64)[nodes]
+    domset_array = numpy.fromiter(domset, dtype=numpy.int64, count=len(domset))
+    assert numpy.isin(dominators, domset_array).all()
+    heads = numpy.repeat(dominators, numpy.diff(indptr))
+    tails = dominators[indices]
+    crossing = heads != tails
+    heads, tails = heads[crossing], tails[crossing]
+    # most domgraph edges are found many times over, so dedupe them (in both
+    # directions) with a single sort and add each dominator's neighbors to the
+    # domgraph in bulk
+    m = len(assigned_dominator)
+    codes = numpy.unique(numpy.concatenate((heads * m + tails,
+                                            tails * m + heads)))
+    heads, tails = numpy.divmod(codes, m)
+    starts = numpy.flatnonzero(numpy.diff(heads, prepend=-1))
+    for x, neighbors in zip(heads[starts].tolist(),
+                            numpy.split(tails, starts[1:])):
+        domgraph.add_arcs_to(x, neighbors.tolist())
+
+    # map of dominators to vertices they dominate.  Sorting all of the
+    # vertices by dominator once and cutting out each dominator's run is
+    # much cheaper than maintaining a SortedSet per dominator.  The vertices
+    # of the snapshot are in sorted order and the sort is stable, so each run
+    # is sorted too.
+    by_dominator = numpy.argsort(dominators, kind='stable')
+    owners = dominators[by_dominator]
+    starts = numpy.flatnonzero(numpy.diff(owners, prepend=-1))
+    dominated = SortedDict(zip(
+        owners[starts].tolist(),
+        (group.tolist()
+         for group in numpy.split(nodes[by_dominator], starts[1:]))))
 
     domgraph.remove_isolates()
 
@@ -316,3 +676,65 @@ def rdomset(graph: Graph, radius: int):
     dtf(graph, radius)
     domset = compute_domset(graph, radius)
     return domset
+
+
+def _rdomset_and_domination_graph(graph: Graph, radius: int):
+    """Compute the dominating set and domination graph of graph."""
+    domset = rdomset(graph, radius)
+    domgraph, dominated = domination_graph(graph, domset, radius)
+    return domset, domgraph, dominated
+
+
+def parallel_domination_graph(graph: Graph, radius: int, processes: int):
+    """
+    Compute a dominating set and domination graph of graph using multiple
+    processes.
+
+    The connected components of the graph are independent, so we split them
+    into (at most) processes groups of roughly equal total size, build the
+    subgraph induced by each group and compute its dominating set and
+    domination graph in a separate process.  The results are then combined.
+    Returns domset, domgraph, dominated as rdomset() and domination_graph()
+    would.
+
+    Precondition:  every edge has a corresponding arc in the anti-parallel
+    direction and all arcs have weight 1 (i.e. the graph hasn't been
+    augmented yet)
+    """
+    comps = components(graph)
+
+    # greedily assign the largest components to the smallest group
+    groups = [(0, i, []) for i in range(processes)]
+    for comp in sorted(comps, key=len, reverse=True):
+        size, i, group = heapq.heappop(groups)
+        group.extend(comp)
+        heapq.heappush(groups, (size + len(comp), i, group))
+
+    subgraphs = []
+    for _, _, group in groups:
+        if not group:
+            continue
+        subgraph = DictGraph(nodes=SortedSet(group), r=graph.radius)
+        for v in group:
+            for u in graph.in_neighbors(v, 1):
+                subgraph.add_arc(u, v)
+        subgraphs.append(subgraph)
+
+    print("computing domination graph of {} components in {} groups".format(
+        len(comps), len(subgraphs)))
+
+    with ProcessPoolExecutor(processes) as executor:
+        results = list(executor.map(_rdomset_and_domination_graph, subgraphs,
+                                    itertools.repeat(radius)))
+
+    # the groups are disjoint, so we can simply take the union of everything
+    domset = SortedSet()
+    domgraph = DictGraph(nodes=SortedSet())
+    dominated = SortedDict()  # type: Dict[int, List[int]]
+    for sub_domset, sub_domgraph, sub_dominated in results:
+        domset.update(sub_domset)
+        domgraph.nodes.update(sub_domgraph.nodes)
+        domgraph.inarcs_by_weight[0].update(sub_domgraph.inarcs_by_weight[0])
+        dominated.update(sub_dominated)
+
+    return domset, domgraph, dominated
@@ -0,0 +1,32 @@
+import io
+import os
+import unittest
+
+from .catlas import CAtlas
+
+thisdir = os.path.dirname(__file__)
+catlas_file = os.path.join(thisdir, '..', 'search', 'test-data',
+                           'catlas.dory_k21_r1', 'catlas.csv')
+
+
+class CAtlasArraysTest(unittest.TestCase):
+
+    def test_arrays_roundtrip(self):
+        with open(catlas_file) as fp:
+            root = CAtlas.read(fp)
+
+        arrays = root.to_arrays()
+        self.assertEqual(len(arrays["idx"]), 732)
+        self.assertEqual(len(arrays["indptr"]), 733)
+
+        root2 = CAtlas.read_npz(arrays)
+        self.assertEqual(root2.idx, root.idx)
+
+        out, out2 = io.StringIO(), io.StringIO()
+        root.write(out)
+        root2.write(out2)
+        self.assertEqual(out.getvalue(), out2.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
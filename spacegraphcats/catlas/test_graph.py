@@ -26,6 +26,26 @@ class GraphTest(unittest.TestCase):
         self.assertEqual(graph.in_degree(0), 4)
         self.assertEqual(graph.in_degree(1), 0)
 
+    def test_add_arcs_to(self):
+        graph = Graph(num_nodes=5, radius=2)
+
+        graph.add_arcs_to(0, [1, 2]).add_arcs_to(0, [3], 2)
+        graph.add_arcs_to(0, [2, 4])
+        self.assertEqual(set(graph.in_neighbors(0)),
+                         set([(1, 1), (2, 1), (4, 1), (3, 2)]))
+        self.assertEqual(graph.num_arcs(), 4)
+
+    def test_remove_arcs_to(self):
+        graph = Graph(num_nodes=5, radius=2)
+
+        graph.add_arc(1, 0, 1).add_arc(2, 0, 1).add_arc(3, 0, 2)
+        graph.add_arc(4, 0, 1).add_arc(0, 1, 1)
+
+        graph.remove_arcs_to(0, [1, 3, 4])
+        self.assertEqual(set(graph.in_neighbors(0)), set([(2, 1)]))
+        # arcs into other vertices are untouched
+        self.assertEqual(set(graph.in_neighbors(1)), set([(0, 1)]))
+
     def test_frat_pairs(self):
         frat_graph = Graph(num_nodes=9, radius=5)
         
@@ -2,8 +2,12 @@ import unittest
 import itertools
 import random
 
-from .graph import Graph
-from .rdomset import low_degree_orientation
+from .graph import Graph, DictGraph
+from .rdomset import (low_degree_orientation, parallel_domination_graph,
+                      rdomset, _assign_dominators, _assign_dominators_csr,
+                      fraternal_csr, ldo_csr, ldo_removal_order,
+                      _ldo_removal_order_csr, dtf, compute_domset,
+                      _compute_domset_csr)
 
 
 class ParserRDomset(unittest.TestCase):
@@ -64,6 +68,83 @@ class ParserRDomset(unittest.TestCase):
         self.assertTrue(set([(6, 0), (2, 1), (8, 2), (2, 3), (3, 4), (6, 7),
                         (8, 9)]).issubset(set(g.arcs(1))))
 
+    def test_fraternal_csr(self):
+        # repeated edges only show up once
+        m = 10
+        nodes, indptr, indices = fraternal_csr([3 * m + 9, 3 * m + 7,
+                                                3 * m + 7, 3 * m + 9], m)
+
+        self.assertEqual(nodes.tolist(), [3, 7, 9])
+        self.assertEqual(indptr.tolist(), [0, 2, 3, 4])
+        self.assertEqual(indices.tolist(), [1, 2, 0, 0])
+
+    def test_parallel_domination_graph(self):
+        # three paths of different lengths, each its own component
+        g = Graph(num_nodes=30, radius=1)
+        for start, end in [(0, 5), (5, 17), (17, 30)]:
+            for x in range(start, end - 1):
+                g.add_arc(x, x + 1)
+                g.add_arc(x + 1, x)
+
+        domset, domgraph, dominated = parallel_domination_graph(g, 1, 2)
+
+        self.assertEqual(set(dominated.keys()), set(domset))
+        assigned = [v for shadow in dominated.values() for v in shadow]
+        self.assertEqual(sorted(assigned), list(range(30)))
+        for v in domgraph:
+            self.assertIn(v, domset)
+
+        # components are independent, so each component's dominators only
+        # dominate vertices in that component
+        for x, shadow in dominated.items():
+            for start, end in [(0, 5), (5, 17), (17, 30)]:
+                if start <= x < end:
+                    self.assertTrue(all(start <= v < end for v in shadow))
+
+    def test_assign_dominators_csr(self):
+        random.seed(1)
+        n = 300
+        for radius in (1, 2, 3):
+            g = Graph(num_nodes=n, radius=radius)
+            # non-consecutive vertex ids for the DictGraph copy
+            dg = DictGraph(r=radius)
+            for v in range(n):
+                dg.add_node(3 * v)
+            for x, y in itertools.combinations(range(n), 2):
+                if random.random() < 2 / n:
+                    g.add_arc(x, y).add_arc(y, x)
+                    dg.add_arc(3 * x, 3 * y).add_arc(3 * y, 3 * x)
+
+            for graph in (g, dg):
+                domset = rdomset(graph, radius)
+                self.assertEqual(_assign_dominators_csr(graph, domset, radius),
+                                 _assign_dominators(graph, domset, radius))
+
+    def test_ldo_removal_order_csr(self):
+        random.seed(2)
+        n = 300
+        graph = Graph(num_nodes=n, radius=1)
+        for x, y in itertools.combinations(range(n), 2):
+            if random.random() < 4 / n:
+                graph.add_arc(x, y).add_arc(y, x)
+
+        _, indptr, indices = ldo_csr(graph)
+        self.assertEqual(_ldo_removal_order_csr(indptr, indices),
+                         ldo_removal_order(indptr, indices))
+
+    def test_compute_domset_csr(self):
+        random.seed(3)
+        n = 300
+        for radius in (1, 2, 3):
+            graph = Graph(num_nodes=n, radius=radius)
+            for x, y in itertools.combinations(range(n), 2):
+                if random.random() < 2 / n:
+                    graph.add_arc(x, y).add_arc(y, x)
+            dtf(graph, radius)
+
+            self.assertEqual(_compute_domset_csr(graph, radius),
+                             compute_domset(graph, radius))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -126,6 +126,12 @@ def main(argv=sys.argv[1:]):
 
     db.commit()
 
+    # index the labels so that retrieval by cDBG ID doesn't have to scan
+    # every row in the table.
+    print('indexing labels...')
+    cursor.execute('CREATE INDEX sequences_label ON sequences (label)')
+    db.commit()
+
     db.close()
     print('done!')
 
@@ -5,7 +5,8 @@ table connecting k-mers in the cDBG to cDBG node IDs.
 Input: a directory containing a contigs.fa.gz
 
 Output: contigs.fa.gz.mphf, a BBHash MPHF savefile; and contigs.fa.gz.indices,
-a numpy savez file containing mphf_to_kmer, kmer_to_cdbg, and sizes.
+a numpy savez file containing mphf_to_kmer, kmer_to_cdbg, and sizes.  The
+savez file is left uncompressed so that searches can memory-map the arrays.
 
 Note: relies on the fact that for a cDBG constructed at a particular k,
 no k-mer will appear in more than one cDBG node and every k-mer will
@@ -97,10 +98,10 @@ def main(argv):
 
     x.save(mphf_filename)
     with open(array_filename, 'wb') as fp:
-        numpy.savez_compressed(fp,
-                               mphf_to_kmer=mphf_to_kmer,
-                               kmer_to_cdbg=mphf_to_cdbg,
-                               sizes=sizes)
+        numpy.savez(fp,
+                    mphf_to_kmer=mphf_to_kmer,
+                    kmer_to_cdbg=mphf_to_cdbg,
+                    sizes=sizes)
 
 
 if __name__ == '__main__':
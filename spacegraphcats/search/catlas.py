@@ -1,7 +1,11 @@
+import itertools
 import os
 from collections import defaultdict
-import csv
-from typing import Dict, Set, List
+from typing import Any, Dict, Iterator, Set, List
+
+import numpy
+
+from .search_utils import load_contigs_size_info
 
 
 class CAtlas:
@@ -63,6 +67,26 @@ class CAtlas:
             if level == 1:
                 self._cdbg_to_catlas[int(cdbg_id)] = node_id
 
+        # node ID -> parent node ID as an array, and the node IDs on each
+        # level (1 to max_level), for propagating values up the catlas.
+        n = max(self.levels, default=-1) + 1
+        self.__parents = numpy.full(n, -1, dtype=numpy.int64)
+        children = numpy.fromiter(self.parent.keys(), dtype=numpy.int64,
+                                  count=len(self.parent))
+        self.__parents[children] = numpy.fromiter(self.parent.values(),
+                                                  dtype=numpy.int64,
+                                                  count=len(self.parent))
+
+        node_ids = numpy.fromiter(self.levels.keys(), dtype=numpy.int64,
+                                  count=len(self.levels))
+        levels = numpy.fromiter(self.levels.values(), dtype=numpy.int64,
+                                count=len(self.levels))
+        self.__nodes_by_level_flat = node_ids[numpy.argsort(levels,
+                                                            kind='stable')]
+        bounds = numpy.searchsorted(numpy.sort(levels),
+                                    numpy.arange(2, self.max_level + 1))
+        self.__nodes_by_level = numpy.split(self.__nodes_by_level_flat, bounds)
+
     def __load_first_level(self, domfile):
         """
         Load the mapping between first layer catlas and the original DBG nodes.
@@ -85,42 +109,25 @@ class CAtlas:
             for cdbg_id in beneath:
                 self.cdbg_to_layer1[cdbg_id] = equiv_cdbg_to_catlas
 
+        # CSR-style copy of layer1_to_cdbg for bulk shadow lookups: the cDBG
+        # nodes under layer 1 node n are
+        # _layer1_cdbg[_layer1_indptr[n]:_layer1_indptr[n + 1]].
+        layer1_ids = sorted(self.layer1_to_cdbg)
+        sizes = numpy.zeros(max(self.levels, default=-1) + 1, dtype=numpy.int64)
+        sizes[layer1_ids] = [len(self.layer1_to_cdbg[n]) for n in layer1_ids]
+        self._layer1_indptr = numpy.concatenate(([0], numpy.cumsum(sizes)))
+        self._layer1_cdbg = numpy.fromiter(
+            itertools.chain.from_iterable(self.layer1_to_cdbg[n]
+                                          for n in layer1_ids),
+            dtype=numpy.int64, count=self._layer1_indptr[-1])
+
     def __load_size_info(self, sizefile, min_abund):
-        kmer_sizes = {}
-        weighted_kmer_sizes = {}
         # load size information from file
-        with open(sizefile, 'rt') as fp:
-            reader = csv.DictReader(fp)
-            for row in reader:
-                contig_id = int(row['contig_id'])
-                n_kmers = int(row['n_kmers'])
-                mean_abund = float(row['mean_abund'])
-                if not min_abund or mean_abund >= min_abund:
-                    kmer_sizes[contig_id] = n_kmers
-                    weighted_kmer_sizes[contig_id] = mean_abund*n_kmers
+        kmer_sizes, weighted_kmer_sizes = load_contigs_size_info(sizefile,
+                                                                 min_abund)
         # propagate upwards
-        self.kmer_sizes = {}
-        self.weighted_kmer_sizes = {}
-        for node_id in self:
-            level = self.levels[node_id]
-            if level == 1:                    # aggregate across cDBG nodes
-                total_kmers = 0
-                total_weighted_kmers = 0
-                for cdbg_node in self.layer1_to_cdbg.get(node_id):
-                    total_kmers += kmer_sizes.get(cdbg_node, 0)
-                    total_weighted_kmers += weighted_kmer_sizes.get(cdbg_node,
-                                                                    0)
-
-                self.kmer_sizes[node_id] = total_kmers
-                self.weighted_kmer_sizes[node_id] = total_weighted_kmers
-            else:                             # aggregate across children
-                sub_size = 0
-                sub_weighted_size = 0
-                for child_id in self.children[node_id]:
-                    sub_size += self.kmer_sizes[child_id]
-                    sub_weighted_size += self.weighted_kmer_sizes[child_id]
-                self.kmer_sizes[node_id] = sub_size
-                self.weighted_kmer_sizes[node_id] = sub_weighted_size
+        self.kmer_sizes = self.shadow_sums(kmer_sizes)
+        self.weighted_kmer_sizes = self.shadow_sums(weighted_kmer_sizes)
 
     def __iter__(self):
         """
@@ -140,16 +147,53 @@ class CAtlas:
         return len(self.parent)
 
     def decorate_with_shadow_sizes(self):
-        self.shadow_sizes = {}
-        for node_id in self:
-            level = self.levels[node_id]
-            if level == 1:
-                self.shadow_sizes[node_id] = len(self.layer1_to_cdbg[node_id])
-            else:
-                sub_size = 0
-                for child_id in self.children[node_id]:
-                    sub_size += self.shadow_sizes[child_id]
-                self.shadow_sizes[node_id] = sub_size
+        layer1_sizes = numpy.diff(self._layer1_indptr)
+        self.shadow_sizes = self.__to_dict(self.__sum_upwards(layer1_sizes))
+
+    def shadow_sums(self, cdbg_values) -> Dict[int, Any]:
+        """
+        Return a dictionary of catlas node ID -> the sum of cdbg_values over
+        the cDBG nodes in that node's shadow.
+
+        cdbg_values is either a numpy array indexed by cDBG ID or a
+        dictionary; cDBG IDs missing from a dictionary count as 0.
+        """
+        cdbg_ids = self._layer1_cdbg
+        if isinstance(cdbg_values, dict):
+            values = numpy.array([cdbg_values.get(cdbg_id, 0)
+                                  for cdbg_id in cdbg_ids.tolist()])
+        else:
+            values = numpy.asarray(cdbg_values)[cdbg_ids]
+
+        if values.dtype.kind in 'biu':
+            values = values.astype(numpy.int64)
+        else:
+            values = values.astype(numpy.float64)
+
+        # sum over the cDBG nodes under each layer 1 node...
+        layer1_ids = numpy.repeat(numpy.arange(len(self._layer1_indptr) - 1),
+                                  numpy.diff(self._layer1_indptr))
+        totals = numpy.zeros(len(self._layer1_indptr) - 1, dtype=values.dtype)
+        numpy.add.at(totals, layer1_ids, values)
+
+        # ...and then on up the catlas.
+        return self.__to_dict(self.__sum_upwards(totals))
+
+    def __sum_upwards(self, totals):
+        """
+        Sum an array of per-node values, indexed by catlas node ID and
+        nonzero only at layer 1, up the catlas so that every node above
+        layer 1 holds the sum over its children.  This goes a level at a
+        time, adding every node on a level into its parent in one step.
+        """
+        totals = numpy.array(totals)
+        for nodes in self.__nodes_by_level[:-1]:
+            numpy.add.at(totals, self.__parents[nodes], totals[nodes])
+        return totals
+
+    def __to_dict(self, totals):
+        node_ids = self.__nodes_by_level_flat
+        return dict(zip(node_ids.tolist(), totals[node_ids].tolist()))
 
     def decorate_with_index_sizes(self, index):
         self.index_sizes = index.build_catlas_node_sizes(self)
@@ -160,35 +204,44 @@ class CAtlas:
         If nodes is specified, return only those leaves that are descendants of
         the specified nodes; otherwise, return all of them.
         """
+        return set(self.leaves_iter(nodes))
+
+    def leaves_iter(self, nodes: List[int]=None) -> Iterator[int]:
+        """
+        Iterate over the leaves of this CAtlas, as leaves() does, yielding
+        each of them once.
+        """
         if nodes is None:
             nodes = [self.root]
-        leaves = set()  # type: Set[int]
         seen_nodes = set()  # type: Set[int]
 
-        def add_to_shadow(node_id: int):
+        # iterative DFS, so that deep catlases don't hit the recursion limit
+        stack = list(nodes)
+        while stack:
+            node_id = stack.pop()
             if node_id in seen_nodes:
-                return
+                continue
             seen_nodes.add(node_id)
 
             children_ids = self.children[node_id]
 
             if len(children_ids) == 0:
-                leaves.add(node_id)
+                yield node_id
             else:
-                for child in children_ids:
-                    add_to_shadow(child)
-
-        for node in nodes:
-            add_to_shadow(node)
-
-        return leaves
+                stack.extend(children_ids)
 
     def shadow(self, nodes: List[int]) -> Set[int]:
         """
         Return the cDBG vertices in the shadow of the specified nodes.
         """
-        leaves = self.leaves(nodes)
-        shadow = set()
-        for leaf in leaves:
-            shadow.update(self.layer1_to_cdbg[leaf])
-        return shadow
+        leaves = numpy.fromiter(self.leaves_iter(nodes), dtype=numpy.int64)
+        starts = self._layer1_indptr[leaves]
+        lengths = self._layer1_indptr[leaves + 1] - starts
+
+        # gather all of the leaves' slices of _layer1_cdbg in one go: entry
+        # i of slice j sits at output position (ends[j] - lengths[j]) + i.
+        ends = numpy.cumsum(lengths)
+        positions = numpy.arange(lengths.sum()) + \
+            numpy.repeat(starts - (ends - lengths), lengths)
+
+        return set(self._layer1_cdbg[positions].tolist())
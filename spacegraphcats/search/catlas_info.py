@@ -26,11 +26,9 @@ def main(argv=sys.argv[1:]):
                                                        len(dag[top_node_id])))
 
     layer1_to_cdbg = catlas.layer1_to_cdbg
-    x = set()
-    for v in layer1_to_cdbg.values():
-        x.update(v)
-    total_cdbg_count = len(x)
-    print('{} layer 1 catlas nodes, corresponding to {} cDBG nodes.'.format(len(layer1_to_cdbg), len(x)))
+    # every cDBG node under a layer 1 node is a key in cdbg_to_layer1.
+    total_cdbg_count = len(catlas.cdbg_to_layer1)
+    print('{} layer 1 catlas nodes, corresponding to {} cDBG nodes.'.format(len(layer1_to_cdbg), total_cdbg_count))
 
     with open(gxtfile, 'rt') as fp:
         graph = read_from_gxt(fp, 1, False)
@@ -53,6 +53,7 @@ def compute_matrix(group_info, group_ident, ksize, output):
     all_kmers = make_all(ksize)
     all_kmer_hashes = list(set([hash_murmur(i) for i in all_kmers]))
     all_kmer_hashes.sort()
+    all_kmer_hashes = numpy.array(all_kmer_hashes, dtype=numpy.uint64)
 
     # now, build a matrix of GROUP_N rows x 4**ksize columns, where each
     # row will be the set of k-mer abundances associated with each group.
@@ -63,10 +64,15 @@ def compute_matrix(group_info, group_ident, ksize, output):
         if i % 1000 == 0:
             print('...', i, len(group_info))
         mh = group_info[n]
-        vec = dict(mh.get_mins(with_abundance=True))
-        vec = [vec.get(hashval, 0) for hashval in all_kmer_hashes]
-        vec = numpy.array(vec)
-        V[i] = vec
+        abunds = dict(mh.get_mins(with_abundance=True))
+        hashes = numpy.fromiter(abunds.keys(), dtype=numpy.uint64,
+                                count=len(abunds))
+        counts = numpy.fromiter(abunds.values(), dtype=numpy.int64,
+                                count=len(abunds))
+        # all_kmer_hashes is sorted, so we can find the column for every
+        # hash in the group at once rather than looking up each possible
+        # k-mer in turn.
+        V[i, numpy.searchsorted(all_kmer_hashes, hashes)] = counts
 
         node_id_to_group_idx[n] = i
 
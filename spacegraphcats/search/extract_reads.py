@@ -44,7 +44,7 @@ def main(argv=sys.argv[1:]):
     if outname.endswith('.gz'):
         outfp = gzip.open(outname, 'wt')
     else:
-        outfp = open(outname, 'wt')
+        outfp = open(outname, 'wt', buffering=1024*1024)
 
     with gzip.open(args.node_list_file, 'rt') as fp:
         cdbg_shadow = set([int(x.strip()) for x in fp])
@@ -1,4 +1,6 @@
 import os
+import struct
+import zipfile
 import bbhash
 import numpy
 
@@ -27,68 +29,45 @@ class MPHF_KmerIndex(object):
 
     def build_catlas_node_sizes(self, catlas):
         """Count the number of kmers in the shadow of each catlas node."""
-        node_kmer_sizes = {}
-        for node_id in catlas:
-            level = catlas.levels[node_id]
-            if level == 1:
-                total_kmers = 0
-                for cdbg_node in catlas.layer1_to_cdbg.get(node_id):
-                    total_kmers += self.get_cdbg_size(cdbg_node)
-
-                node_kmer_sizes[node_id] = total_kmers
-            else:
-                sub_size = 0
-                for child_id in catlas.children[node_id]:
-                    sub_size += node_kmer_sizes[child_id]
-                node_kmer_sizes[node_id] = sub_size
-
-        return node_kmer_sizes
+        return catlas.shadow_sums(self.cdbg_sizes)
 
     def get_match_counts(self, query_kmers):
         "Return a dictionary containing cdbg_id -> # of matches in query_kmers"
-        match_counts = {}
-        n_matched = 0
-        n = 0
-        for n, hashval in enumerate(query_kmers):
-            if n % 1000000 == 0:
-                print('matching ...', n, end='\r')
-
-            cdbg_id = self.get_cdbg_id(hashval)
-            if cdbg_id is not None:
-                match_counts[cdbg_id] = match_counts.get(cdbg_id, 0) + 1
-                n_matched += 1
-
-        if n:
-            print('... found {} matches to {} k-mers total.'.format(n_matched,
-                                                                    n + 1))
+        n = len(query_kmers)
+        if not n:
+            return {}
+
+        print('matching {} k-mers ...'.format(n), end='\r')
+
+        # look up all of the query k-mers, using -1 for "not found"
+        lookup = self.mphf.lookup
+        mphf_hashes = numpy.fromiter((-1 if m is None else m
+                                      for m in map(lookup, query_kmers)),
+                                     dtype=numpy.int64, count=n)
+        kmer_hashes = numpy.fromiter(query_kmers, dtype=numpy.uint64, count=n)
+
+        # then check for exact matches and count them per cDBG node in bulk,
+        # rather than one k-mer at a time.
+        found = mphf_hashes >= 0
+        mphf_hashes = mphf_hashes[found]
+        exact = self.mphf_to_kmer[mphf_hashes] == kmer_hashes[found]
+        cdbg_ids, counts = numpy.unique(self.mphf_to_cdbg_id[mphf_hashes[exact]],
+                                        return_counts=True)
+        match_counts = dict(zip(cdbg_ids.tolist(), counts.tolist()))
+
+        print('... found {} matches to {} k-mers total.'.format(
+            int(counts.sum()), n))
 
         return match_counts
 
     def build_catlas_match_counts(self, match_counts, catlas):
-        node_match_counts = {}
-        total_kmers_in_query_nodes = 0.
-        for node_id in catlas:
-            level = catlas.levels[node_id]
-            if level == 1:
-                query_kmers = 0
-                all_kmers_in_node = 0
-                for cdbg_node in catlas.layer1_to_cdbg.get(node_id):
-                    query_kmers += match_counts.get(cdbg_node, 0)
-                    all_kmers_in_node += self.get_cdbg_size(cdbg_node)
-
-                if query_kmers:
-                    node_match_counts[node_id] = query_kmers
-                    total_kmers_in_query_nodes += all_kmers_in_node
-
-                    assert all_kmers_in_node >= query_kmers
-
-            else:
-                sub_size = 0
-                for child_id in catlas.children[node_id]:
-                    sub_size += node_match_counts.get(child_id, 0)
+        node_sizes = self.build_catlas_node_sizes(catlas)
 
-                if sub_size:
-                    node_match_counts[node_id] = sub_size
+        node_match_counts = {}
+        for node_id, count in catlas.shadow_sums(match_counts).items():
+            if count:
+                assert node_sizes[node_id] >= count
+                node_match_counts[node_id] = count
 
         return node_match_counts
 
@@ -100,9 +79,53 @@ class MPHF_KmerIndex(object):
         if not os.path.exists(mphf_filename):
             raise FileNotFoundError(mphf_filename)
         mphf = bbhash.load_mphf(mphf_filename)
-        with open(array_filename, 'rb') as fp:
-            np_dict = numpy.load(fp)
-            mphf_to_kmer = np_dict['mphf_to_kmer']
-            mphf_to_cdbg = np_dict['kmer_to_cdbg']
-            cdbg_sizes = np_dict['sizes']
+        np_dict = load_arrays(array_filename)
+        mphf_to_kmer = np_dict['mphf_to_kmer']
+        mphf_to_cdbg = np_dict['kmer_to_cdbg']
+        cdbg_sizes = np_dict['sizes']
         return cls(mphf, mphf_to_kmer, mphf_to_cdbg, cdbg_sizes)
+
+
+def load_arrays(filename):
+    """
+    Load all of the arrays in a numpy savez file into a dictionary.
+
+    Arrays that were stored uncompressed (numpy.savez) are memory-mapped
+    read-only straight out of the file rather than being read in, so
+    loading is nearly free and pages are only touched as they're used.
+    Compressed members (numpy.savez_compressed) are read in as usual.
+    """
+    arrays = {}
+    with zipfile.ZipFile(filename) as zf, open(filename, 'rb') as fp:
+        for info in zf.infolist():
+            name = info.filename
+            if name.endswith('.npy'):
+                name = name[:-4]
+
+            if info.compress_type != zipfile.ZIP_STORED:
+                with zf.open(info) as member_fp:
+                    arrays[name] = numpy.lib.format.read_array(member_fp)
+                continue
+
+            # skip the member's local file header to get to the .npy data;
+            # the name and extra field lengths are at bytes 26-30.
+            fp.seek(info.header_offset + 26)
+            name_len, extra_len = struct.unpack('<HH', fp.read(4))
+            fp.seek(name_len + extra_len, os.SEEK_CUR)
+
+            version = numpy.lib.format.read_magic(fp)
+            if version == (1, 0):
+                header = numpy.lib.format.read_array_header_1_0(fp)
+            else:
+                header = numpy.lib.format.read_array_header_2_0(fp)
+            shape, fortran_order, dtype = header
+
+            if not numpy.prod(shape):      # can't mmap zero bytes
+                arrays[name] = numpy.zeros(shape, dtype)
+            else:
+                order = 'F' if fortran_order else 'C'
+                arrays[name] = numpy.memmap(fp, dtype=dtype, mode='r',
+                                            shape=shape, order=order,
+                                            offset=fp.tell())
+
+    return arrays
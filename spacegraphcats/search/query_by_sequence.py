@@ -36,17 +36,29 @@ class QueryOutput:
         self.query_sig = self.query.sig
         self.contigs_minhash = self.query.mh.copy_and_clear()
         self.catlas_name = catlas_name
+        # containment & similarity are reported both after retrieval and in
+        # the output, so compute them once per set of retrieved contigs.
+        self._containment = None
+        self._similarity = None
 
     def __add_sequence(self, sequence):
         self.contigs_minhash.add_sequence(str(sequence), True)
         self.total_bp += len(sequence)
         self.total_seq += 1
+        self._containment = None
+        self._similarity = None
 
     def containment(self):
-        return self.query_sig.minhash.contained_by(self.contigs_minhash)
+        if self._containment is None:
+            self._containment = \
+                self.query_sig.minhash.contained_by(self.contigs_minhash)
+        return self._containment
 
     def similarity(self):
-        return self.query_sig.minhash.similarity(self.contigs_minhash)
+        if self._similarity is None:
+            self._similarity = \
+                self.query_sig.minhash.similarity(self.contigs_minhash)
+        return self._similarity
 
     def retrieve_contigs(self, contigs):
         "extract contigs using cDBG shadow."
@@ -161,6 +173,7 @@ class Query:
 
         self.cdbg_match_counts = {}
         self.catlas_match_counts = {}
+        self.upper_bounds = {}
 
     def execute(self, catlas, kmer_idx):
         cat_id = catlas.name
@@ -201,7 +214,10 @@ class Query:
     def con_sim_upper_bounds(self, catlas, kmer_idx):
         """
         Compute "best possible" bounds on the containment and similarity of the
-        output of this query."""
+        output of this query.  These are only computed once per catlas."""
+        if catlas.name in self.upper_bounds:
+            return self.upper_bounds[catlas.name]
+
         root = catlas.root
 
         cdbg_match_counts = self.cdbg_match_counts[catlas.name]
@@ -238,7 +254,9 @@ class Query:
                 total_kmers_in_query_nodes
             notify('minimum catlas overhead: {:.1f}%', catlas_min_overhead*100)
 
-        return best_containment, cdbg_min_overhead, catlas_min_overhead
+        self.upper_bounds[catlas.name] = \
+            (best_containment, cdbg_min_overhead, catlas_min_overhead)
+        return self.upper_bounds[catlas.name]
 
 
 def main(argv):
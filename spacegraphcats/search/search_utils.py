@@ -1,5 +1,6 @@
 import collections
 import csv
+import functools
 import os
 import sqlite3
 
@@ -22,21 +23,22 @@ def sqlite_get_max_offset(cursor):
 
 
 def sqlite_get_offsets(cursor, cdbg_ids):
-    seen_offsets = set()
+    last_offset = None
     seen_labels = set()
 
     cursor.execute('DROP TABLE IF EXISTS label_query')
     cursor.execute('CREATE TEMPORARY TABLE label_query (label_id INTEGER PRIMARY KEY);')
 
-    for label in cdbg_ids:
-        cursor.execute('INSERT INTO label_query (label_id) VALUES (?)', (label,))
+    cursor.executemany('INSERT INTO label_query (label_id) VALUES (?)',
+                       ((label,) for label in cdbg_ids))
 
     cursor.execute('SELECT DISTINCT sequences.offset,sequences.label FROM sequences WHERE label in (SELECT label_id FROM label_query) ORDER BY offset')
 
-    for n, (offset, label) in enumerate(cursor):
-        if offset not in seen_offsets:
+    # results are ordered by offset, so duplicates are always adjacent.
+    for offset, label in cursor:
+        if offset != last_offset:
             yield offset
-        seen_offsets.add(offset)
+        last_offset = offset
         seen_labels.add(label)
 
     seen_labels -= cdbg_ids
@@ -161,20 +163,80 @@ def get_reads_by_cdbg(sqlite_filename, reads_filename, cdbg_ids):
     db = sqlite3.connect(sqlite_filename)
     cursor = db.cursor()
 
-    # open readsfile for random access
-    reads_grabber = GrabBGZF_Random(reads_filename)
-
     ## get last offset in file as measure of progress
     last_offset = sqlite_get_max_offset(cursor)
 
+    # open readsfile for random access
+    reads_grabber = GrabBGZF_Random(reads_filename)
+
     # pull out the offsets of all sequences with matches in cdbg_ids.
-    for offset in sqlite_get_offsets(cursor, cdbg_ids):
-        offset_f = offset / last_offset
+    offsets = sqlite_get_offsets(cursor, cdbg_ids)
+    for record, offset in iterate_records_at(reads_grabber, offsets):
+        yield record, offset / last_offset
+
+
+def iterate_records_at(grabber, offsets):
+    """
+    Retrieve the records starting at each of 'offsets' from a
+    GrabBGZF_Random, yielding (record, offset).
+
+    The offsets must be sorted, so we only ever move forward through the
+    file: records in the BGZF block we're already in are reached by
+    parsing forward through the inflated buffer, and we only seek when
+    the next record lives in a later block.  That way each block holding
+    a match is inflated exactly once, and blocks without one are skipped.
+    """
+    reader = grabber.reader
+
+    records = None
+    for offset in offsets:
+        if records is None or (offset >> 16) > (reader.tell() >> 16):
+            reader.seek(offset)
+            records = grabber.iter_fn(reader)
+
+        for record, pos in records:
+            if pos >= offset:
+                break
+        assert pos == offset
+
+        yield record, offset
+
+
+def load_contigs_info(info_filename):
+    """
+    Load a contigs .info.csv file, as created by bcalm_to_gxt, into a
+    dictionary of numpy arrays keyed by column name.
 
-        record, xx = reads_grabber.get_sequence_at(offset)
-        assert xx == offset
+    All of the columns are numeric, so the whole file is handed to numpy
+    in one go rather than being parsed row by row.
+    """
+    with open(info_filename, 'rt') as info_fp:
+        header = info_fp.readline().strip().split(',')
+        body = info_fp.read().strip().replace('\n', ',')
+
+    values = numpy.fromstring(body, sep=',').reshape(-1, len(header))
+
+    info = {}
+    for i, column in enumerate(header):
+        if column == 'mean_abund':
+            info[column] = values[:, i]
+        else:
+            info[column] = values[:, i].astype(numpy.int64)
+
+    return info
+
+
+@functools.lru_cache(maxsize=4)
+def load_contig_offsets(info_filename):
+    """
+    Load the contig_id -> BGZF offset table from a contigs .info.csv file,
+    as created by bcalm_to_gxt.
 
-        yield record, offset_f
+    This is cached, so that running many queries against the same catlas
+    only parses the table once.
+    """
+    info = load_contigs_info(info_filename)
+    return dict(zip(info['contig_id'].tolist(), info['offset'].tolist()))
 
 
 def get_contigs_by_cdbg(contigs_filename, cdbg_ids):
@@ -182,26 +244,22 @@ def get_contigs_by_cdbg(contigs_filename, cdbg_ids):
     Given a list of cDBG IDs, retrieve the actual contig sequences
     corresponding to them by using offsets into a BGZF file.
 
-    This works by iterating over the contig offsets in contigs.fa.gz.info.csv,
-    which is created by bcalm_to_gxt; and then seeking into the contigs.fa.gz
-    BGZF file to extract the specific sequence.
+    This works by looking up the contig offsets in contigs.fa.gz.info.csv,
+    which is created by bcalm_to_gxt; and then walking through the
+    contigs.fa.gz BGZF file in offset order to extract the sequences.
     """
     info_filename = contigs_filename + '.info.csv'
     reads_grabber = GrabBGZF_Random(contigs_filename)
 
-    with open(info_filename, 'rt') as info_fp:
-        r = csv.DictReader(info_fp)
-
-        for row in r:
-            contig_id = int(row['contig_id'])
-            if contig_id in cdbg_ids:
-                offset = int(row['offset'])
+    contig_offsets = load_contig_offsets(info_filename)
+    offsets = sorted((contig_offsets[contig_id], contig_id)
+                     for contig_id in cdbg_ids if contig_id in contig_offsets)
 
-                record, xx = reads_grabber.get_sequence_at(offset)
-                assert xx == offset
-                assert int(record.name) == contig_id, (record.name,contig_id)
+    records = iterate_records_at(reads_grabber, [x[0] for x in offsets])
+    for (record, offset), (_, contig_id) in zip(records, offsets):
+        assert int(record.name) == contig_id, (record.name,contig_id)
 
-                yield record
+        yield record
 
 
 ### MPHF stuff
@@ -213,17 +271,29 @@ def load_kmer_index(catlas_prefix):
 
 def load_cdbg_size_info(catlas_prefix, min_abund=0.0):
     filename = os.path.join(catlas_prefix, 'contigs.fa.gz.info.csv')
-    with open(filename, 'rt') as fp:
-        cdbg_kmer_sizes = {}
-        cdbg_weighted_kmer_sizes = {}
-        r = csv.DictReader(fp)
-        for row in r:
-            contig_id = int(row['contig_id'])
-            n_kmers = int(row['n_kmers'])
-            mean_abund = float(row['mean_abund'])
-            if not min_abund or mean_abund >= min_abund:
-                cdbg_kmer_sizes[contig_id] = n_kmers
-                cdbg_weighted_kmer_sizes[contig_id] = mean_abund*n_kmers
+    return load_contigs_size_info(filename, min_abund)
+
+
+def load_contigs_size_info(info_filename, min_abund=0.0):
+    """
+    Return contig_id -> # of k-mers and contig_id -> abundance-weighted
+    # of k-mers from a contigs .info.csv file, for contigs with a mean
+    abundance of at least min_abund.
+    """
+    info = load_contigs_info(info_filename)
+
+    contig_ids = info['contig_id']
+    n_kmers = info['n_kmers']
+    mean_abund = info['mean_abund']
+    if min_abund:
+        keep = mean_abund >= min_abund
+        contig_ids, n_kmers, mean_abund = \
+            contig_ids[keep], n_kmers[keep], mean_abund[keep]
+
+    contig_ids = contig_ids.tolist()
+    cdbg_kmer_sizes = dict(zip(contig_ids, n_kmers.tolist()))
+    cdbg_weighted_kmer_sizes = dict(zip(contig_ids,
+                                        (mean_abund * n_kmers).tolist()))
 
     return cdbg_kmer_sizes, cdbg_weighted_kmer_sizes
 
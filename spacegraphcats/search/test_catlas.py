@@ -42,6 +42,38 @@ class Test_LoadCatlas(object):
     def test_len(self):
         assert len(self.catlas) == 731
 
+    def test_leaves(self):
+        leaves = self.catlas.leaves()
+        assert len(leaves) == 571
+        for node_id in leaves:
+            assert self.catlas.levels[node_id] == 1
+
+        # each leaf is only produced once, even from overlapping nodes
+        nodes = [self.catlas.root] + list(self.catlas.children[self.catlas.root])
+        leaves_list = list(self.catlas.leaves_iter(nodes))
+        assert len(leaves_list) == 571
+        assert set(leaves_list) == leaves
+
+    def test_shadow(self):
+        assert self.catlas.shadow([self.catlas.root]) == \
+            set(self.catlas.cdbg_to_layer1)
+
+        for node_id in self.catlas:
+            expected = set()
+            for leaf in self.catlas.leaves([node_id]):
+                expected.update(self.catlas.layer1_to_cdbg[leaf])
+            assert self.catlas.shadow([node_id]) == expected
+
+    def test_shadow_sums(self):
+        cdbg_values = {cdbg_id: cdbg_id % 7
+                       for cdbg_id in self.catlas.cdbg_to_layer1}
+        sums = self.catlas.shadow_sums(cdbg_values)
+        assert set(sums) == set(self.catlas.levels)
+
+        for node_id in self.catlas:
+            shadow = self.catlas.shadow([node_id])
+            assert sums[node_id] == sum(cdbg_values[x] for x in shadow)
+
     def test_shadow_sizes(self):
         total_shadow_size = 0
         for node_id, level in self.catlas.levels.items():
@@ -0,0 +1,35 @@
+import os
+import tempfile
+
+import numpy
+
+from .index import load_arrays
+
+
+def _save_and_load(savefn):
+    mphf_to_kmer = numpy.arange(1000, dtype=numpy.uint64) * 7919
+    kmer_to_cdbg = numpy.arange(1000, dtype=numpy.uint32) // 10
+    sizes = numpy.zeros(0, dtype=numpy.uint32)
+
+    with tempfile.TemporaryDirectory() as location:
+        filename = os.path.join(location, 'contigs.fa.gz.indices')
+        with open(filename, 'wb') as fp:
+            savefn(fp, mphf_to_kmer=mphf_to_kmer,
+                   kmer_to_cdbg=kmer_to_cdbg, sizes=sizes)
+
+        arrays = load_arrays(filename)
+        assert set(arrays) == {'mphf_to_kmer', 'kmer_to_cdbg', 'sizes'}
+        assert numpy.array_equal(arrays['mphf_to_kmer'], mphf_to_kmer)
+        assert numpy.array_equal(arrays['kmer_to_cdbg'], kmer_to_cdbg)
+        assert arrays['sizes'].dtype == sizes.dtype
+        assert len(arrays['sizes']) == 0
+
+        return isinstance(arrays['mphf_to_kmer'], numpy.memmap)
+
+
+def test_load_arrays_mmap():
+    assert _save_and_load(numpy.savez)
+
+
+def test_load_arrays_compressed():
+    assert not _save_and_load(numpy.savez_compressed)
@@ -70,6 +70,8 @@ def test_dory_query_workflow(location):
     args.level = 0
     args.radius = 1
     args.project = 'dory_k21_r1'
+    args.processes = 1
+    args.binary_checkpoint = False
     print('** running catlas')
     catlas.main(args)
 